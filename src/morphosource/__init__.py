@@ -1,4 +1,9 @@
 from morphosource.search import search_media, get_media, search_objects, get_object, ObjectTypes
 from morphosource.download import DownloadConfig, DownloadVisibility
+from morphosource.thumbnail import fetch_thumbnails
+from morphosource.plan import plan_downloads, download_plan, DownloadOrder
+from morphosource.crawl import crawl_media_shard, merge_shards, get_crawl_total_pages
+from morphosource.sync import sync_media_bundles
 __all__ = [search_media, get_media, DownloadConfig, DownloadVisibility, search_objects,
-           get_object, ObjectTypes]
+           get_object, ObjectTypes, fetch_thumbnails, plan_downloads, download_plan, DownloadOrder,
+           crawl_media_shard, merge_shards, get_crawl_total_pages, sync_media_bundles]
@@ -0,0 +1,150 @@
+# Splits a full search_media crawl into shards that can run in separate processes or machines.
+# Each shard appends one JSON line per fetched page to its own checkpoint file so a failed shard
+# can be restarted alone, and merge_shards combines the checkpoint files into one result set.
+import inspect
+import json
+import os
+from morphosource.search import search_media, Media
+from morphosource.exceptions import IncompleteCrawlError
+
+DEFAULT_CRAWL_PER_PAGE = 100
+SEARCH_MEDIA_SIGNATURE = inspect.signature(search_media)
+
+
+def get_shard_pages(total_pages, shard_index, shard_count):
+    # Deterministically split pages 1..total_pages into shard_count contiguous ranges
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1.")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be between 0 and {shard_count - 1}.")
+    start = total_pages * shard_index // shard_count + 1
+    end = total_pages * (shard_index + 1) // shard_count
+    return list(range(start, end + 1))
+
+
+def read_checkpoint(path):
+    # Returns the checkpoint header and a dict of page number to raw media data
+    header = None
+    pages = {}
+    if not os.path.exists(path):
+        return header, pages
+    with open(path) as infile:
+        for line in infile:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Skip a partial line left by an interrupted write
+                continue
+            if "total_pages" in record:
+                header = record
+            else:
+                pages[record["page"]] = record["media"]
+    return header, pages
+
+
+def _terminate_partial_line(path):
+    # Make sure new records do not get appended to a line left partially written by an interrupted crawl
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb+") as outfile:
+            outfile.seek(-1, os.SEEK_END)
+            if outfile.read(1) != b"\n":
+                outfile.write(b"\n")
+
+
+def _write_record(outfile, record):
+    outfile.write(json.dumps(record) + "\n")
+    outfile.flush()
+
+
+def get_crawl_total_pages(per_page=DEFAULT_CRAWL_PER_PAGE, **search_params):
+    # Look up total_pages once so every shard of a crawl splits the same page range
+    return search_media(per_page=per_page, page=1, **search_params).pages["total_pages"]
+
+
+def _normalize_search_params(search_params):
+    # Check search_params before a checkpoint is written, and convert them to the form they take
+    # after a round trip through JSON (eg. tuples become lists) so they compare equal on resume
+    SEARCH_MEDIA_SIGNATURE.bind(page=1, per_page=1, **search_params)
+    return json.loads(json.dumps(search_params))
+
+
+def _check_checkpoint_header(path, header, expected):
+    for key, value in expected.items():
+        if header[key] != value:
+            raise ValueError(f"Checkpoint {path} has {key} {header[key]!r} but {value!r} was requested.")
+
+
+def crawl_media_shard(shard_index, shard_count, path, per_page=DEFAULT_CRAWL_PER_PAGE, total_pages=None,
+                      **search_params):
+    # search_params are passed to search_media (eg. query, media_type, visibility).
+    # Multi-shard crawls require total_pages from get_crawl_total_pages so all shards split the same pages.
+    normalized_search_params = _normalize_search_params(search_params)
+    header, completed_pages = read_checkpoint(path)
+    first_page_results = None
+    if header:
+        expected = {"shard_index": shard_index, "shard_count": shard_count, "per_page": per_page,
+                    "search_params": normalized_search_params}
+        if total_pages is not None:
+            expected["total_pages"] = total_pages
+        _check_checkpoint_header(path, header, expected)
+        total_pages = header["total_pages"]
+    elif total_pages is None:
+        if shard_count > 1:
+            raise ValueError("total_pages is required when shard_count is greater than 1. "
+                             "Use get_crawl_total_pages() to look it up once for all shards.")
+        first_page_results = search_media(per_page=per_page, page=1, **search_params)
+        total_pages = first_page_results.pages["total_pages"]
+    _terminate_partial_line(path)
+    with open(path, "a") as outfile:
+        if not header:
+            _write_record(outfile, {
+                "total_pages": total_pages, "per_page": per_page,
+                "shard_index": shard_index, "shard_count": shard_count,
+                "search_params": normalized_search_params,
+            })
+        for page in get_shard_pages(total_pages, shard_index, shard_count):
+            if page in completed_pages:
+                continue
+            if page == 1 and first_page_results:
+                results = first_page_results
+            else:
+                results = search_media(per_page=per_page, page=page, **search_params)
+            _write_record(outfile, {"page": page, "media": [media.data for media in results.items]})
+    return path
+
+
+def merge_shards(paths):
+    # Combine shard checkpoints in page order, keeping the first occurrence of each media id.
+    # Raises IncompleteCrawlError listing the shards and pages that still need to be crawled.
+    pages = {}
+    headers = {}
+    for path in paths:
+        header, shard_pages = read_checkpoint(path)
+        if not header:
+            raise IncompleteCrawlError(f"Checkpoint {path} is missing or has not been started.")
+        headers[path] = header
+        pages.update(shard_pages)
+    if not headers:
+        raise ValueError("No checkpoints to merge.")
+    first_path, first_header = next(iter(headers.items()))
+    crawl_keys = ["total_pages", "per_page", "shard_count", "search_params"]
+    for path, header in headers.items():
+        for key in crawl_keys:
+            if header[key] != first_header[key]:
+                raise ValueError(f"Checkpoint {path} has {key} {header[key]!r} but checkpoint {first_path} "
+                                 f"has {first_header[key]!r}.")
+    shard_count = first_header["shard_count"]
+    missing_shards = sorted(set(range(shard_count)) - {header["shard_index"] for header in headers.values()})
+    missing_pages = [page for page in range(1, first_header["total_pages"] + 1) if page not in pages]
+    if missing_shards or missing_pages:
+        raise IncompleteCrawlError(f"Crawl is incomplete. Missing shards: {missing_shards} of {shard_count}. "
+                                   f"Missing pages: {missing_pages}.")
+    items = []
+    seen_ids = set()
+    for page in sorted(pages):
+        for data in pages[page]:
+            media = Media(data)
+            if media.id not in seen_ids:
+                seen_ids.add(media.id)
+                items.append(media)
+    return items
@@ -1,3 +1,5 @@
+import os
+import threading
 import requests
 from requests.exceptions import HTTPError
 from morphosource.config import Endpoints
@@ -52,6 +54,32 @@ def download_file(url, path, api_key, chunk_size):
             fd.write(chunk)
 
 
+def download_file_if_modified(url, path, api_key, chunk_size, etag=None, last_modified=None):
+    # Returns the response headers, or None when the server reports the file has not changed
+    headers = {"Authorization": api_key}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    download_response = requests.get(url, headers=headers, stream=True)
+    if download_response.status_code == 304:
+        return None
+    download_response.raise_for_status()
+    # Write to a temporary file so an interrupted download never replaces a complete file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as fd:
+            for chunk in download_response.iter_content(chunk_size=chunk_size):
+                fd.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Remove the partial file so failed or interrupted downloads do not leave it behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return download_response.headers
+
+
 def download_media_bundle(media_id, path, download_config):
     download_url = get_download_media_zip_url(media_id=media_id, download_config=download_config)
     download_file(url=download_url, api_key=download_config.api_key, path=path,
@@ -9,3 +9,6 @@ class ItemNotFound(Exception):
 class MetadataMissingError(Exception):
     pass
 
+
+class IncompleteCrawlError(Exception):
+    pass
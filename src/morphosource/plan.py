@@ -0,0 +1,88 @@
+# Plans media bundle downloads so a batch fits within the available disk space
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from morphosource.search import get_media_file_metadata
+from morphosource.download import download_media_bundle
+from morphosource.exceptions import MetadataMissingError, ItemNotFound
+
+DEFAULT_PLAN_WORKERS = 4
+
+
+class DownloadOrder(object):
+    # Largest first keeps concurrent workers evenly loaded, smallest first gives faster feedback
+    LARGEST_FIRST = "largest_first"
+    SMALLEST_FIRST = "smallest_first"
+
+
+class PlannedDownload(object):
+    def __init__(self, media_id, path, file_size):
+        self.media_id = media_id
+        self.path = path
+        self.file_size = file_size
+
+
+class DownloadPlan(object):
+    def __init__(self, scheduled, deferred, budget):
+        self.scheduled = scheduled
+        self.deferred = deferred
+        self.budget = budget
+
+    @property
+    def total_size(self):
+        return sum(item.file_size for item in self.scheduled)
+
+
+def _get_file_size(media_id):
+    try:
+        return get_media_file_metadata(media_id).file_size
+    except (MetadataMissingError, ItemNotFound):
+        return None
+
+
+def get_download_budget(dest_dir, byte_budget=None):
+    free_space = shutil.disk_usage(dest_dir).free
+    if byte_budget is None:
+        return free_space
+    return min(byte_budget, free_space)
+
+
+def plan_downloads(media_ids, dest_dir, byte_budget=None, order=DownloadOrder.LARGEST_FIRST,
+                   workers=DEFAULT_PLAN_WORKERS):
+    # Media without a known file size are deferred since they cannot be checked against the budget
+    media_ids = list(media_ids)
+    if order not in (DownloadOrder.LARGEST_FIRST, DownloadOrder.SMALLEST_FIRST):
+        raise ValueError(f"Unknown download order: {order}")
+    os.makedirs(dest_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        file_sizes = list(executor.map(_get_file_size, media_ids))
+    budget = get_download_budget(dest_dir, byte_budget)
+    items = []
+    deferred = []
+    for media_id, file_size in zip(media_ids, file_sizes):
+        item = PlannedDownload(media_id=media_id, path=os.path.join(dest_dir, f"{media_id}.zip"),
+                               file_size=file_size)
+        if file_size is None:
+            deferred.append(item)
+        else:
+            items.append(item)
+    items.sort(key=lambda item: item.file_size, reverse=order == DownloadOrder.LARGEST_FIRST)
+    scheduled = []
+    remaining = budget
+    for item in items:
+        if item.file_size <= remaining:
+            scheduled.append(item)
+            remaining -= item.file_size
+        else:
+            deferred.append(item)
+    return DownloadPlan(scheduled=scheduled, deferred=deferred, budget=budget)
+
+
+def download_plan(plan, download_config, workers=DEFAULT_PLAN_WORKERS):
+    # Items are started in plan order so each worker picks up the next item as soon as it is free
+    def download(item):
+        download_media_bundle(media_id=item.media_id, path=item.path, download_config=download_config)
+        return item.path
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(download, plan.scheduled))
@@ -56,6 +56,7 @@ class FileMetadata(object):
         self.file_size = _get(data, "file_size")
         self.mime_type = _get(data, "mime_type")
         self.contents_mime_type = _get(data, "contents_mime_type")
+        self.date_modified = _get(data, "date_modified")
         self.data = data
 
 
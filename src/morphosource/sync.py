@@ -0,0 +1,90 @@
+# Refreshes a directory of previously downloaded media bundles, downloading only missing or changed bundles
+import json
+import os
+from morphosource.search import get_media_file_metadata
+from morphosource.download import get_download_media_zip_url, download_file_if_modified
+from morphosource.exceptions import MetadataMissingError, ItemNotFound
+
+MANIFEST_FILENAME = "morphosource-manifest.json"
+
+
+class SyncResult(object):
+    def __init__(self):
+        self.downloaded = []
+        self.unchanged = []
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+
+def read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def write_manifest(path, manifest):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as outfile:
+        json.dump(manifest, outfile, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _get_file_metadata(media_id):
+    try:
+        metadata = get_media_file_metadata(media_id)
+        return {"file_size": metadata.file_size, "date_modified": metadata.date_modified}
+    except (MetadataMissingError, ItemNotFound):
+        return None
+
+
+def _is_metadata_unchanged(entry, metadata):
+    # Only trust file metadata that includes a modification date
+    return bool(metadata and metadata["date_modified"] and entry.get("metadata") == metadata)
+
+
+def sync_media_bundle(media_id, dest_dir, download_config, manifest):
+    # Returns True when a new bundle was downloaded, updating manifest in place
+    path = os.path.join(dest_dir, f"{media_id}.zip")
+    entry = manifest.get(media_id)
+    local_size = os.path.getsize(path) if os.path.exists(path) else None
+    metadata = _get_file_metadata(media_id)
+    etag = None
+    last_modified = None
+    if entry and local_size == entry["file_size"]:
+        if _is_metadata_unchanged(entry, metadata):
+            return False
+        etag = entry.get("etag")
+        last_modified = entry.get("last_modified")
+    download_url = get_download_media_zip_url(media_id=media_id, download_config=download_config)
+    headers = download_file_if_modified(url=download_url, path=path, api_key=download_config.api_key,
+                                        chunk_size=download_config.chunk_size, etag=etag,
+                                        last_modified=last_modified)
+    if headers is None:
+        entry["metadata"] = metadata
+        return False
+    manifest[media_id] = {
+        "file_size": os.path.getsize(path),
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "metadata": metadata,
+    }
+    return True
+
+
+def sync_media_bundles(media_ids, dest_dir, download_config):
+    # Bundles are saved as <media_id>.zip in dest_dir alongside a manifest recording what was downloaded
+    os.makedirs(dest_dir, exist_ok=True)
+    manifest_path = os.path.join(dest_dir, MANIFEST_FILENAME)
+    manifest = read_manifest(manifest_path)
+    result = SyncResult()
+    for media_id in media_ids:
+        if sync_media_bundle(media_id, dest_dir, download_config, manifest):
+            result.downloaded.append(media_id)
+            result.bytes_downloaded += manifest[media_id]["file_size"]
+        else:
+            result.unchanged.append(media_id)
+            result.bytes_saved += manifest[media_id]["file_size"]
+        # Save after each bundle so an interrupted sync keeps its progress
+        write_manifest(manifest_path, manifest)
+    return result
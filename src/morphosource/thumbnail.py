@@ -0,0 +1,110 @@
+# Fetches media thumbnails concurrently into a size-bounded on-disk cache
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+DEFAULT_THUMBNAIL_WORKERS = 8
+DEFAULT_THUMBNAIL_CACHE_SIZE = 512 * 1024 * 1024  # 512 MB
+THUMBNAIL_CACHE_SUFFIX = ".thumbnail"
+
+
+def get_thumbnail_cache_path(url, dest_dir):
+    # Thumbnail URLs contain a t=<timestamp> param so a changed thumbnail gets a new cache key
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(dest_dir, f"{key}{THUMBNAIL_CACHE_SUFFIX}")
+
+
+def create_session(workers):
+    # Share one connection pool sized to the number of workers
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_thumbnail(session, url, path):
+    # Returns None when the thumbnail could not be downloaded
+    try:
+        # Mark the cache entry as recently used
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        # Not cached, or removed by another process pruning the same cache
+        pass
+    try:
+        response = session.get(url)
+        response.raise_for_status()
+    except RequestException:
+        return None
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as fd:
+            fd.write(response.content)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Remove the partial file since the cache size limit only accounts for complete thumbnails
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def prune_thumbnail_cache(dest_dir, max_cache_size, keep=()):
+    # Remove least recently used cache entries until the cache fits within max_cache_size.
+    # Entries in keep are never removed so the cache can exceed max_cache_size when they do not fit.
+    # Files removed by another process pruning the same cache are skipped.
+    entries = []
+    for name in os.listdir(dest_dir):
+        if name.endswith(THUMBNAIL_CACHE_SUFFIX):
+            path = os.path.join(dest_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_cache_size:
+            break
+        if path not in keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+def fetch_thumbnails(media_items, dest_dir, workers=DEFAULT_THUMBNAIL_WORKERS,
+                     max_cache_size=DEFAULT_THUMBNAIL_CACHE_SIZE, as_bytes=False):
+    # Returns a list in the same order as media_items with None for media without a thumbnail
+    # and for thumbnails that failed to download.
+    # Returned paths are kept in the cache, so a batch larger than max_cache_size leaves the cache over
+    # its limit until a later call prunes it. With as_bytes the whole cache is pruned after reading.
+    os.makedirs(dest_dir, exist_ok=True)
+    urls = [media.get_thumbnail_url() for media in media_items]
+    pending = {get_thumbnail_cache_path(url, dest_dir): url for url in urls if url}
+    fetched = {}
+    if pending:
+        with create_session(workers) as session:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {path: executor.submit(fetch_thumbnail, session, url, path) for path, url in pending.items()}
+                fetched = {path: future.result() for path, future in futures.items()}
+    paths = [fetched[get_thumbnail_cache_path(url, dest_dir)] if url else None for url in urls]
+    if as_bytes:
+        results = [_read_bytes(path) if path else None for path in paths]
+        if pending:
+            prune_thumbnail_cache(dest_dir, max_cache_size)
+        return results
+    if pending:
+        prune_thumbnail_cache(dest_dir, max_cache_size, keep=set(pending))
+    return paths
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as fd:
+        return fd.read()
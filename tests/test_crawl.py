@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, call
+from morphosource.crawl import get_shard_pages, crawl_media_shard, merge_shards, read_checkpoint, \
+    get_crawl_total_pages
+from morphosource.exceptions import IncompleteCrawlError
+from morphosource.search import Media, SearchResults
+
+PAGE_MEDIA = {
+    1: [{'id': ['000390223']}, {'id': ['000390218']}],
+    2: [{'id': ['000390213']}, {'id': ['000390208']}],
+    3: [{'id': ['000390208']}, {'id': ['000390204']}],
+}
+
+
+def fake_search_media(per_page, page, **kwargs):
+    return SearchResults([Media(data) for data in PAGE_MEDIA[page]], [], {"total_pages": 3})
+
+
+class TestCrawl(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def get_path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_get_shard_pages(self):
+        self.assertEqual(get_shard_pages(10, 0, 3), [1, 2, 3])
+        self.assertEqual(get_shard_pages(10, 1, 3), [4, 5, 6])
+        self.assertEqual(get_shard_pages(10, 2, 3), [7, 8, 9, 10])
+        self.assertEqual(get_shard_pages(1, 0, 2), [])
+        self.assertEqual(get_shard_pages(1, 1, 2), [1])
+
+    def test_get_shard_pages_invalid(self):
+        with self.assertRaises(ValueError):
+            get_shard_pages(10, 3, 3)
+        with self.assertRaises(ValueError):
+            get_shard_pages(10, 0, 0)
+
+    def write_checkpoint(self, path, header, pages):
+        with open(path, "w") as outfile:
+            outfile.write(json.dumps(header) + "\n")
+            for page in pages:
+                outfile.write(json.dumps({"page": page, "media": PAGE_MEDIA[page]}) + "\n")
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_get_crawl_total_pages(self, mock_search_media):
+        self.assertEqual(get_crawl_total_pages(per_page=2, query="Fruitadens"), 3)
+        mock_search_media.assert_called_once_with(per_page=2, page=1, query="Fruitadens")
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard(self, mock_search_media):
+        path = self.get_path("shard0.jsonl")
+        crawl_media_shard(0, 2, path, per_page=2, total_pages=3, query="Fruitadens")
+        header, pages = read_checkpoint(path)
+        self.assertEqual(header, {"total_pages": 3, "per_page": 2, "shard_index": 0, "shard_count": 2,
+                                  "search_params": {"query": "Fruitadens"}})
+        self.assertEqual(pages, {1: PAGE_MEDIA[1]})
+        mock_search_media.assert_called_once_with(per_page=2, page=1, query="Fruitadens")
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard_single_shard(self, mock_search_media):
+        path = self.get_path("shard0.jsonl")
+        crawl_media_shard(0, 1, path, per_page=2, query="Fruitadens")
+        _, pages = read_checkpoint(path)
+        self.assertEqual(pages, PAGE_MEDIA)
+        # First page is reused rather than fetched twice
+        mock_search_media.assert_has_calls([
+            call(per_page=2, page=1, query="Fruitadens"),
+            call(per_page=2, page=2, query="Fruitadens"),
+            call(per_page=2, page=3, query="Fruitadens"),
+        ])
+        self.assertEqual(mock_search_media.call_count, 3)
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard_requires_total_pages(self, mock_search_media):
+        with self.assertRaises(ValueError):
+            crawl_media_shard(0, 2, self.get_path("shard0.jsonl"))
+        mock_search_media.assert_not_called()
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard_resume(self, mock_search_media):
+        path = self.get_path("shard1.jsonl")
+        self.write_checkpoint(path, {"total_pages": 3, "per_page": 2, "shard_index": 1, "shard_count": 2,
+                                     "search_params": {}}, [2])
+        with open(path, "a") as outfile:
+            outfile.write('{"page": 3, "med')
+        crawl_media_shard(1, 2, path, per_page=2)
+        _, pages = read_checkpoint(path)
+        self.assertEqual(pages, {2: PAGE_MEDIA[2], 3: PAGE_MEDIA[3]})
+        mock_search_media.assert_called_once_with(per_page=2, page=3)
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard_resume_tuple_params(self, mock_search_media):
+        path = self.get_path("shard0.jsonl")
+        media_type = ("Mesh", "CT Image Series")
+        crawl_media_shard(0, 2, path, per_page=2, total_pages=3, media_type=media_type)
+        header, _ = read_checkpoint(path)
+        self.assertEqual(header["search_params"], {"media_type": ["Mesh", "CT Image Series"]})
+        crawl_media_shard(0, 2, path, per_page=2, total_pages=3, media_type=media_type)
+        self.assertEqual(mock_search_media.call_count, 1)
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_crawl_media_shard_invalid_params(self, mock_search_media):
+        path = self.get_path("shard0.jsonl")
+        with self.assertRaises(TypeError):
+            crawl_media_shard(0, 2, path, per_page=2, total_pages=3, qeury="Fruitadens")
+        self.assertFalse(os.path.exists(path))
+        crawl_media_shard(0, 2, path, per_page=2, total_pages=3, query="Fruitadens")
+        mock_search_media.assert_called_once_with(per_page=2, page=1, query="Fruitadens")
+
+    def test_crawl_media_shard_wrong_checkpoint(self):
+        path = self.get_path("shard1.jsonl")
+        header = {"total_pages": 3, "per_page": 2, "shard_index": 1, "shard_count": 2,
+                  "search_params": {"query": "Fruitadens"}}
+        self.write_checkpoint(path, header, [])
+        with self.assertRaises(ValueError):
+            crawl_media_shard(0, 2, path, per_page=2, query="Fruitadens")
+        with self.assertRaises(ValueError):
+            crawl_media_shard(1, 2, path, per_page=10, query="Fruitadens")
+        with self.assertRaises(ValueError):
+            crawl_media_shard(1, 2, path, per_page=2, total_pages=4, query="Fruitadens")
+        with self.assertRaises(ValueError) as raised_exception:
+            crawl_media_shard(1, 2, path, per_page=2, query="Chalcides")
+        self.assertIn("search_params", str(raised_exception.exception))
+
+    @patch("morphosource.crawl.search_media", side_effect=fake_search_media)
+    def test_merge_shards(self, mock_search_media):
+        paths = [self.get_path(f"shard{index}.jsonl") for index in range(2)]
+        for index, path in enumerate(paths):
+            crawl_media_shard(index, 2, path, total_pages=3)
+        items = merge_shards(reversed(paths))
+        self.assertEqual([media.id for media in items], ['000390223', '000390218', '000390213', '000390208',
+                                                          '000390204'])
+
+    def test_merge_shards_missing_checkpoint(self):
+        path = self.get_path("shard0.jsonl")
+        self.write_checkpoint(path, {"total_pages": 3, "per_page": 2, "shard_index": 0, "shard_count": 2,
+                                     "search_params": {}}, [1])
+        with self.assertRaises(IncompleteCrawlError):
+            merge_shards([path, self.get_path("shard1.jsonl")])
+
+    def test_merge_shards_incomplete_shard(self):
+        paths = [self.get_path(f"shard{index}.jsonl") for index in range(2)]
+        header = {"total_pages": 3, "per_page": 2, "shard_count": 2, "search_params": {}}
+        self.write_checkpoint(paths[0], dict(header, shard_index=0), [1])
+        self.write_checkpoint(paths[1], dict(header, shard_index=1), [2])
+        with self.assertRaises(IncompleteCrawlError) as raised_exception:
+            merge_shards(paths)
+        self.assertEqual(str(raised_exception.exception),
+                         "Crawl is incomplete. Missing shards: [] of 2. Missing pages: [3].")
+
+    def test_merge_shards_missing_shard(self):
+        path = self.get_path("shard0.jsonl")
+        self.write_checkpoint(path, {"total_pages": 3, "per_page": 2, "shard_index": 0, "shard_count": 2,
+                                     "search_params": {}}, [1])
+        with self.assertRaises(IncompleteCrawlError) as raised_exception:
+            merge_shards([path])
+        self.assertEqual(str(raised_exception.exception),
+                         "Crawl is incomplete. Missing shards: [1] of 2. Missing pages: [2, 3].")
+
+    def test_merge_shards_mismatched_headers(self):
+        paths = [self.get_path(f"shard{index}.jsonl") for index in range(2)]
+        header = {"total_pages": 3, "per_page": 2, "shard_count": 2, "search_params": {}}
+        self.write_checkpoint(paths[0], dict(header, shard_index=0), [1])
+        self.write_checkpoint(paths[1], dict(header, shard_index=1, total_pages=4), [2, 3])
+        with self.assertRaises(ValueError):
+            merge_shards(paths)
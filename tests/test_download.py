@@ -1,7 +1,10 @@
+import os
+import tempfile
+import threading
 import unittest
 import requests
 from unittest.mock import patch, Mock, mock_open
-from morphosource.download import download_media_bundle, get_download_media_zip_url, \
+from morphosource.download import download_media_bundle, get_download_media_zip_url, download_file_if_modified, \
     DownloadConfig, Endpoints
 from morphosource.exceptions import RestrictedDownloadError
 
@@ -80,3 +83,55 @@ Please visit https://www.morphosource.org and request download permission for me
         url = get_download_media_zip_url(media_id="1", download_config=download_config)
 
         self.assertEqual(url, "someurl")
+
+    @patch("morphosource.download.os.replace")
+    @patch("morphosource.download.requests")
+    @patch('builtins.open', new_callable=mock_open)
+    def test_download_file_if_modified(self, mock_file, mock_requests, mock_replace):
+        get_response = Mock(status_code=200, headers={"ETag": '"abc"'})
+        get_response.iter_content.return_value = ["somedata"]
+        mock_requests.get.return_value = get_response
+
+        headers = download_file_if_modified(url="someurl", path="/tmp/123.zip", api_key="Secret", chunk_size=1024,
+                                            etag='"abc"', last_modified="Wed, 21 Oct 2020 00:48:47 GMT")
+
+        self.assertEqual(headers, {"ETag": '"abc"'})
+        expected_headers = {
+            'Authorization': 'Secret',
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Wed, 21 Oct 2020 00:48:47 GMT',
+        }
+        mock_requests.get.assert_called_with('someurl', headers=expected_headers, stream=True)
+        tmp_path = f"/tmp/123.zip.{os.getpid()}.{threading.get_ident()}.tmp"
+        mock_file.assert_called_with(tmp_path, 'wb')
+        mock_replace.assert_called_with(tmp_path, "/tmp/123.zip")
+
+    @patch("morphosource.download.requests")
+    def test_download_file_if_modified_interrupted(self, mock_requests):
+        def iter_content(chunk_size):
+            yield b"some"
+            raise requests.exceptions.ConnectionError()
+        get_response = Mock(status_code=200)
+        get_response.iter_content.side_effect = iter_content
+        mock_requests.get.return_value = get_response
+
+        with tempfile.TemporaryDirectory() as dest_dir:
+            path = os.path.join(dest_dir, "123.zip")
+            with open(path, "wb") as fd:
+                fd.write(b"olddata")
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                download_file_if_modified(url="someurl", path=path, api_key="Secret", chunk_size=1024)
+            self.assertEqual(os.listdir(dest_dir), ["123.zip"])
+            with open(path, "rb") as fd:
+                self.assertEqual(fd.read(), b"olddata")
+
+    @patch("morphosource.download.requests")
+    @patch('builtins.open', new_callable=mock_open)
+    def test_download_file_if_modified_not_modified(self, mock_file, mock_requests):
+        mock_requests.get.return_value = Mock(status_code=304)
+
+        headers = download_file_if_modified(url="someurl", path="/tmp/123.zip", api_key="Secret", chunk_size=1024,
+                                            etag='"abc"')
+
+        self.assertIsNone(headers)
+        mock_file.assert_not_called()
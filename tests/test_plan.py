@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch, Mock, call
+from morphosource.download import DownloadConfig
+from morphosource.exceptions import MetadataMissingError, ItemNotFound
+from morphosource.plan import plan_downloads, download_plan, DownloadOrder
+
+download_config = DownloadConfig(
+    api_key="Secret", use_statement="Downloading this data as part of a research project.", use_categories=["Research"]
+)
+FILE_SIZES = {"1": 300, "2": 100, "3": 200, "4": 500}
+
+
+def get_file_metadata(media_id):
+    if media_id == "6":
+        raise ItemNotFound(f"No media file metadata found with id {media_id}")
+    if media_id not in FILE_SIZES:
+        raise MetadataMissingError(f"No metadata returned by MorphoSource for id: {media_id}")
+    return Mock(file_size=FILE_SIZES[media_id])
+
+
+@patch("morphosource.plan.os.makedirs")
+@patch("morphosource.plan.shutil.disk_usage")
+@patch("morphosource.plan.get_media_file_metadata", side_effect=get_file_metadata)
+class TestPlan(unittest.TestCase):
+    def test_plan_downloads_largest_first(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=10000)
+        plan = plan_downloads(["1", "2", "3", "4"], "/tmp/bundles")
+        self.assertEqual([item.media_id for item in plan.scheduled], ["4", "1", "3", "2"])
+        self.assertEqual(plan.scheduled[0].path, "/tmp/bundles/4.zip")
+        self.assertEqual(plan.deferred, [])
+        self.assertEqual(plan.total_size, 1100)
+        self.assertEqual(plan.budget, 10000)
+
+    def test_plan_downloads_generator(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=250)
+        plan = plan_downloads((media_id for media_id in ["1", "2"]), "/tmp/bundles")
+        self.assertEqual([item.media_id for item in plan.scheduled], ["2"])
+        self.assertEqual([item.media_id for item in plan.deferred], ["1"])
+
+    def test_plan_downloads_smallest_first(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=10000)
+        plan = plan_downloads(["1", "2", "3", "4"], "/tmp/bundles", order=DownloadOrder.SMALLEST_FIRST)
+        self.assertEqual([item.media_id for item in plan.scheduled], ["2", "3", "1", "4"])
+
+    def test_plan_downloads_byte_budget(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=10000)
+        plan = plan_downloads(["1", "2", "3", "4"], "/tmp/bundles", byte_budget=650)
+        self.assertEqual([item.media_id for item in plan.scheduled], ["4", "2"])
+        self.assertEqual([item.media_id for item in plan.deferred], ["1", "3"])
+        self.assertEqual(plan.budget, 650)
+
+    def test_plan_downloads_free_space(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=350)
+        plan = plan_downloads(["1", "2", "3", "4"], "/tmp/bundles", byte_budget=1000)
+        self.assertEqual([item.media_id for item in plan.scheduled], ["1"])
+        self.assertEqual(plan.budget, 350)
+
+    def test_plan_downloads_missing_metadata(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=10000)
+        plan = plan_downloads(["5", "2", "6"], "/tmp/bundles")
+        self.assertEqual([item.media_id for item in plan.scheduled], ["2"])
+        self.assertEqual([item.media_id for item in plan.deferred], ["5", "6"])
+        self.assertIsNone(plan.deferred[0].file_size)
+        self.assertIsNone(plan.deferred[1].file_size)
+
+    def test_plan_downloads_creates_dest_dir(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=10000)
+        plan_downloads(["1"], "/tmp/bundles")
+        mock_makedirs.assert_called_with("/tmp/bundles", exist_ok=True)
+
+    def test_plan_downloads_unknown_order(self, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        with self.assertRaises(ValueError):
+            plan_downloads(["1"], "/tmp/bundles", order="random")
+
+    @patch("morphosource.plan.download_media_bundle")
+    def test_download_plan(self, mock_download_media_bundle, mock_get_metadata, mock_disk_usage, mock_makedirs):
+        mock_disk_usage.return_value = Mock(free=400)
+        plan = plan_downloads(["1", "2", "3"], "/tmp/bundles")
+        paths = download_plan(plan, download_config, workers=1)
+        self.assertEqual(paths, ["/tmp/bundles/1.zip", "/tmp/bundles/2.zip"])
+        mock_download_media_bundle.assert_has_calls([
+            call(media_id="1", path="/tmp/bundles/1.zip", download_config=download_config),
+            call(media_id="2", path="/tmp/bundles/2.zip", download_config=download_config),
+        ])
@@ -246,6 +246,7 @@ class TestSearch(unittest.TestCase):
         self.assertEqual(metadata.file_size, 1784225321)
         self.assertEqual(metadata.mime_type, "application/zip")
         self.assertEqual(metadata.contents_mime_type, "application/dicom")
+        self.assertEqual(metadata.date_modified, "2020-10-21T00:48:47Z")
         self.assertEqual(metadata.data, MS_FILE_METADATA)
 
     @patch("morphosource.search.fetch_item")
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, Mock
+from morphosource.download import DownloadConfig
+from morphosource.exceptions import MetadataMissingError, ItemNotFound
+from morphosource.sync import sync_media_bundles, read_manifest, MANIFEST_FILENAME
+
+download_config = DownloadConfig(
+    api_key="Secret", use_statement="Downloading this data as part of a research project.", use_categories=["Research"]
+)
+METADATA = Mock(file_size=1784225321, date_modified="2020-10-21T00:48:47Z")
+METADATA_DICT = {"file_size": 1784225321, "date_modified": "2020-10-21T00:48:47Z"}
+
+
+def fake_download(url, path, api_key, chunk_size, etag, last_modified):
+    with open(path, "wb") as fd:
+        fd.write(b"0123456789")
+    return {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2020 00:48:47 GMT"}
+
+
+@patch("morphosource.sync.get_download_media_zip_url", return_value="someurl")
+@patch("morphosource.sync.download_file_if_modified", side_effect=fake_download)
+@patch("morphosource.sync.get_media_file_metadata", return_value=METADATA)
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dest_dir = self.tmp_dir.name
+        self.manifest_path = os.path.join(self.dest_dir, MANIFEST_FILENAME)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_bundle(self, media_id, content, manifest_entry):
+        with open(os.path.join(self.dest_dir, f"{media_id}.zip"), "wb") as fd:
+            fd.write(content)
+        manifest = read_manifest(self.manifest_path)
+        manifest[media_id] = manifest_entry
+        with open(self.manifest_path, "w") as outfile:
+            json.dump(manifest, outfile)
+
+    def test_sync_missing_bundle(self, mock_get_metadata, mock_download, mock_get_url):
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.downloaded, ["123"])
+        self.assertEqual(result.bytes_downloaded, 10)
+        self.assertEqual(result.bytes_saved, 0)
+        mock_download.assert_called_with(url="someurl", path=os.path.join(self.dest_dir, "123.zip"),
+                                         api_key="Secret", chunk_size=1048576, etag=None, last_modified=None)
+        self.assertEqual(read_manifest(self.manifest_path), {"123": {
+            "file_size": 10,
+            "etag": '"abc"',
+            "last_modified": "Wed, 21 Oct 2020 00:48:47 GMT",
+            "metadata": METADATA_DICT,
+        }})
+
+    def test_sync_unchanged_metadata(self, mock_get_metadata, mock_download, mock_get_url):
+        self.write_bundle("123", b"0123456789", {"file_size": 10, "etag": '"abc"', "metadata": METADATA_DICT})
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.unchanged, ["123"])
+        self.assertEqual(result.bytes_saved, 10)
+        mock_get_url.assert_not_called()
+        mock_download.assert_not_called()
+
+    def test_sync_truncated_bundle(self, mock_get_metadata, mock_download, mock_get_url):
+        self.write_bundle("123", b"01234", {"file_size": 10, "etag": '"abc"', "metadata": METADATA_DICT})
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.downloaded, ["123"])
+        mock_download.assert_called_with(url="someurl", path=os.path.join(self.dest_dir, "123.zip"),
+                                         api_key="Secret", chunk_size=1048576, etag=None, last_modified=None)
+
+    def test_sync_changed_metadata_not_modified(self, mock_get_metadata, mock_download, mock_get_url):
+        old_metadata = {"file_size": 1000, "date_modified": "2019-01-01T00:00:00Z"}
+        self.write_bundle("123", b"0123456789", {
+            "file_size": 10, "etag": '"abc"', "last_modified": "Tue, 01 Jan 2019 00:00:00 GMT",
+            "metadata": old_metadata,
+        })
+        mock_download.side_effect = None
+        mock_download.return_value = None
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.unchanged, ["123"])
+        self.assertEqual(result.bytes_saved, 10)
+        mock_download.assert_called_with(url="someurl", path=os.path.join(self.dest_dir, "123.zip"),
+                                         api_key="Secret", chunk_size=1048576, etag='"abc"',
+                                         last_modified="Tue, 01 Jan 2019 00:00:00 GMT")
+        self.assertEqual(read_manifest(self.manifest_path)["123"]["metadata"], METADATA_DICT)
+
+    def test_sync_missing_metadata(self, mock_get_metadata, mock_download, mock_get_url):
+        mock_get_metadata.side_effect = MetadataMissingError()
+        self.write_bundle("123", b"0123456789", {"file_size": 10, "etag": '"abc"', "metadata": None})
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.downloaded, ["123"])
+        mock_download.assert_called_with(url="someurl", path=os.path.join(self.dest_dir, "123.zip"),
+                                         api_key="Secret", chunk_size=1048576, etag='"abc"', last_modified=None)
+
+    def test_sync_metadata_not_found(self, mock_get_metadata, mock_download, mock_get_url):
+        mock_get_metadata.side_effect = ItemNotFound()
+        self.write_bundle("123", b"0123456789", {"file_size": 10, "etag": '"abc"', "metadata": METADATA_DICT})
+        mock_download.side_effect = None
+        mock_download.return_value = None
+        result = sync_media_bundles(["123"], self.dest_dir, download_config)
+        self.assertEqual(result.unchanged, ["123"])
+        mock_download.assert_called_with(url="someurl", path=os.path.join(self.dest_dir, "123.zip"),
+                                         api_key="Secret", chunk_size=1048576, etag='"abc"', last_modified=None)
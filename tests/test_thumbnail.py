@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+import requests
+from unittest.mock import patch, Mock
+from morphosource.search import Media
+from morphosource.thumbnail import fetch_thumbnails, get_thumbnail_cache_path, prune_thumbnail_cache
+
+MEDIA1 = Media({'id': ['000390223'], 'file_thumbnail_url': ['/downloads/000390223?file=thumbnail&t=1604144137']})
+MEDIA2 = Media({'id': ['000390218']})
+MEDIA3 = Media({'id': ['000390213'], 'file_thumbnail_url': ['/downloads/000390213?file=thumbnail&t=1604144140']})
+URL1 = "https://www.morphosource.org/downloads/000390223?file=thumbnail&t=1604144137"
+URL3 = "https://www.morphosource.org/downloads/000390213?file=thumbnail&t=1604144140"
+
+
+def create_response(url):
+    return Mock(content=f"image:{url}".encode("utf-8"))
+
+
+def get_mock_session(mock_requests):
+    mock_session = mock_requests.Session.return_value
+    mock_session.__enter__.return_value = mock_session
+    return mock_session
+
+
+class TestThumbnail(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dest_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails(self, mock_requests):
+        mock_session = get_mock_session(mock_requests)
+        mock_session.get.side_effect = create_response
+
+        paths = fetch_thumbnails([MEDIA1, MEDIA2, MEDIA3], self.dest_dir, workers=2)
+
+        self.assertEqual(paths, [
+            get_thumbnail_cache_path(URL1, self.dest_dir),
+            None,
+            get_thumbnail_cache_path(URL3, self.dest_dir),
+        ])
+        with open(paths[0], 'rb') as fd:
+            self.assertEqual(fd.read(), f"image:{URL1}".encode("utf-8"))
+        self.assertEqual(mock_session.get.call_count, 2)
+        mock_session.__exit__.assert_called_once()
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_failed_download(self, mock_requests):
+        mock_session = get_mock_session(mock_requests)
+
+        def get(url):
+            if url == URL1:
+                raise requests.exceptions.HTTPError()
+            return create_response(url)
+        mock_session.get.side_effect = get
+
+        paths = fetch_thumbnails([MEDIA1, MEDIA3], self.dest_dir)
+
+        self.assertEqual(paths, [None, get_thumbnail_cache_path(URL3, self.dest_dir)])
+
+    @patch("morphosource.thumbnail.os.replace", side_effect=OSError())
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_write_failure(self, mock_requests, mock_replace):
+        get_mock_session(mock_requests).get.side_effect = create_response
+
+        with self.assertRaises(OSError):
+            fetch_thumbnails([MEDIA1], self.dest_dir)
+
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_as_bytes(self, mock_requests):
+        get_mock_session(mock_requests).get.side_effect = create_response
+
+        results = fetch_thumbnails([MEDIA2, MEDIA3], self.dest_dir, as_bytes=True)
+
+        self.assertEqual(results, [None, f"image:{URL3}".encode("utf-8")])
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_as_bytes_prunes_batch(self, mock_requests):
+        get_mock_session(mock_requests).get.side_effect = create_response
+
+        results = fetch_thumbnails([MEDIA1, MEDIA3], self.dest_dir, max_cache_size=0, as_bytes=True)
+
+        self.assertEqual(results, [f"image:{URL1}".encode("utf-8"), f"image:{URL3}".encode("utf-8")])
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_keeps_batch_paths(self, mock_requests):
+        get_mock_session(mock_requests).get.side_effect = create_response
+
+        paths = fetch_thumbnails([MEDIA1, MEDIA3], self.dest_dir, max_cache_size=0)
+
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_uses_cache(self, mock_requests):
+        mock_session = get_mock_session(mock_requests)
+        mock_session.get.side_effect = create_response
+
+        fetch_thumbnails([MEDIA1], self.dest_dir)
+        fetch_thumbnails([MEDIA1, MEDIA1, MEDIA3], self.dest_dir)
+
+        self.assertEqual([call[0][0] for call in mock_session.get.call_args_list], [URL1, URL3])
+
+    @patch("morphosource.thumbnail.requests")
+    def test_fetch_thumbnails_no_thumbnails(self, mock_requests):
+        paths = fetch_thumbnails([MEDIA2], self.dest_dir)
+
+        self.assertEqual(paths, [None])
+        mock_requests.Session.assert_not_called()
+
+    def test_prune_thumbnail_cache(self):
+        old_path = get_thumbnail_cache_path(URL1, self.dest_dir)
+        new_path = get_thumbnail_cache_path(URL3, self.dest_dir)
+        for path, mtime in [(old_path, 1000), (new_path, 2000)]:
+            with open(path, 'wb') as fd:
+                fd.write(b"0123456789")
+            os.utime(path, (mtime, mtime))
+
+        prune_thumbnail_cache(self.dest_dir, max_cache_size=15)
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+
+    def test_prune_thumbnail_cache_keeps_requested(self):
+        old_path = get_thumbnail_cache_path(URL1, self.dest_dir)
+        new_path = get_thumbnail_cache_path(URL3, self.dest_dir)
+        for path, mtime in [(old_path, 1000), (new_path, 2000)]:
+            with open(path, 'wb') as fd:
+                fd.write(b"0123456789")
+            os.utime(path, (mtime, mtime))
+
+        prune_thumbnail_cache(self.dest_dir, max_cache_size=15, keep={old_path})
+
+        self.assertTrue(os.path.exists(old_path))
+        self.assertFalse(os.path.exists(new_path))
+
+    @patch("morphosource.thumbnail.os.remove", side_effect=FileNotFoundError())
+    def test_prune_thumbnail_cache_already_removed(self, mock_remove):
+        path = get_thumbnail_cache_path(URL1, self.dest_dir)
+        with open(path, 'wb') as fd:
+            fd.write(b"0123456789")
+
+        prune_thumbnail_cache(self.dest_dir, max_cache_size=0)
+
+        mock_remove.assert_called_once_with(path)